@@ -1,4 +1,5 @@
 import os
+import argparse
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -11,6 +12,9 @@ from google import genai # [수정됨] 지원 종료된 generativeai 대신 최
 import re
 import warnings
 import vectorbt as vbt # 전략 승률 백테스팅용
+import shard_io # 분산(샤드) 스캔 병합용
+import risk_engine # 상관관계 기반 포지션 사이징
+import sector_engine # 섹터 브레드스/로테이션
 
 # pandas 연산 경고 무시 (출력창 깔끔하게 유지)
 warnings.filterwarnings('ignore')
@@ -25,6 +29,9 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 # 포지션 사이징을 위한 총 운용 자본 및 리스크 허용치
 TOTAL_CAPITAL = 100000.0  
 RISK_TOLERANCE_PER_TRADE = 0.01  # 1회 매수 시 총자본의 최대 1% 리스크만 노출 (켈리/리스크 패리티)
+PORTFOLIO_RISK_BUDGET = 0.02     # 추천 종목 전체 합산 일간 변동성 한도 (총자본 대비 2%)
+RISK_WINDOW = 60                 # 공분산 추정 롤링 윈도우 (거래일)
+COV_STATE_PATH = "cov_state_us.npz"  # 공분산 엔진 상태 (실행 간 유지, 워크플로에서 커밋)
 
 # [수정됨] 새로운 Client 기반 API 초기화
 if GEMINI_API_KEY:
@@ -40,9 +47,11 @@ SECTORS = {
     "BIGTECH": ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NFLX"],
     "AI/SW/FIN": ["PLTR", "SNOW", "ADBE", "ORCL", "CRM", "PANW", "COIN", "MSTR", "INTU", "CRWD", "DDOG", "NOW"]
 }
+SECTOR_INDEX = sector_engine.SectorIndex(SECTORS)  # 종목→섹터 역인덱스 (테마 가점 조회 O(1))
 
 # ETF 배제, 미국 주요 우량/성장주 약 250개 (생략 없음)
-STOCKS = list(set([
+# 샤드 분할 시 모든 프로세스가 같은 순서를 쓰도록 정렬 (set 순서는 프로세스마다 다름)
+STOCKS = sorted(set([
     "NVDA", "TSLA", "AAPL", "MSFT", "AMZN", "GOOGL", "META", "AMD", "AVGO", "NFLX", "TSM", "ADBE", "COST", "PEP", "AZN", "LIN", "CSCO", 
     "TMUS", "INTC", "TXN", "QCOM", "AMAT", "ADP", "ISRG", "SBUX", "MDLZ", "GILD", "INTU", "VRTX", "AMGN", "REGN", "PYPL", "FISV", "BKNG", 
     "CSX", "MU", "PANW", "SNPS", "CDNS", "ORLY", "MNST", "MAR", "KDP", "CHTR", "KLAC", "AEP", "LRCX", "ADSK", "DXCM", "MELI", "IDXX", 
@@ -220,36 +229,30 @@ def get_external_data(s, t_obj, curr_p, df_hist):
 # ==========================================
 # [5. 메인 퀀트 엔진 프로세스]
 # ==========================================
-def run_full_scan():
-    print("🚀 NASDAQ Master-Quant System Starting...")
-    if not TELEGRAM_TOKEN or not CHAT_ID: 
-        return print("토큰 설정 확인 필요")
-        
-    kst = pytz.timezone('Asia/Seoul')
-    now = datetime.now(kst)
-    
-    vix, m_perf = get_market_status()
-    is_risky = float(vix) > 24.0 or float(m_perf) < -1.5
-    risk_mode = "⚠️방어운전" if is_risky else "✅안정적"
-    score_min = 45 if risk_mode == "⚠️방어운전" else 30
-
-    # 동적 가중치 배열 (순서: 1.RSI, 2.MACD기울기, 3.거래량, 4.낙폭과대, 5.BB하단, 6.V자반등(데드캣), 7.CMF, 8.ADX)
+def get_scan_weights(is_risky):
+    """동적 가중치 배열 (순서: 1.RSI, 2.MACD기울기, 3.거래량, 4.낙폭과대, 5.BB하단, 6.V자반등(데드캣), 7.CMF, 8.ADX)"""
     if is_risky:
-        WEIGHTS = np.array([20, 5, 5, 20, 15, 20, 10, 5])
-    else:
-        WEIGHTS = np.array([10, 15, 15, 5, 5, 15, 20, 15])
+        return np.array([20, 5, 5, 20, 15, 20, 10, 5])
+    return np.array([10, 15, 15, 5, 5, 15, 20, 15])
 
-    review_list, super_buys, strong_buys, normal_buys = [], [], [], []
-    sector_momentum = {k: 0 for k in SECTORS.keys()}
+def scan_symbols(symbols, is_risky):
+    """종목 리스트를 다운로드/채점하여 (results, sector_counts, review_list, returns) 반환 (샤드 단위로도 호출됨)"""
+    WEIGHTS = get_scan_weights(is_risky)
+    review_list = []
     results = []
+    closes, signals = {}, {}  # 섹터 엔진 입력용 (유동성 필터 통과 종목의 종가, 거래량 급증 양봉 신호)
+    universe_closes = {}      # 공분산 엔진 입력용 (필터와 무관하게 데이터가 있는 전 종목의 종가)
+    if not symbols:
+        return results, sector_engine.accumulate(SECTOR_INDEX, pd.DataFrame(), pd.DataFrame()), review_list, pd.DataFrame()
 
-    print("📥 250일치 과거 데이터 일괄 다운로드 중 (백테스트 포함)...")
-    bulk_data = yf.download(STOCKS, period="250d", group_by="ticker", progress=False, threads=True)
+    print(f"📥 {len(symbols)}개 종목 250일치 과거 데이터 일괄 다운로드 중 (백테스트 포함)...")
+    bulk_data = yf.download(symbols, period="250d", group_by="ticker", progress=False, threads=True)
 
-    for idx, s in enumerate(STOCKS):
+    for idx, s in enumerate(symbols):
         try:
             if s not in bulk_data.columns.levels[0]: continue
             df = bulk_data[s].dropna()
+            universe_closes[s] = df['Close']
             if len(df) < 100: continue
             
             df = calculate_indicators(df)
@@ -275,10 +278,6 @@ def run_full_scan():
             is_deadcat = bool(df['Disparity'].iloc[-3] < 92 and df['ROC3'].iloc[-1] > 2 and df['OBV_Slope'].iloc[-1] < 0)
             is_v_rebound = bool(df['Disparity'].iloc[-3] < 93 and df['ROC3'].iloc[-1] > 4 and df['OBV_Slope'].iloc[-1] > 0)
             
-            if is_vol and curr_p > float(df['Close'].iloc[-2]):
-                for s_name, stocks in SECTORS.items():
-                    if s in stocks: sector_momentum[s_name] += 1
-
             # 벡터 내적을 통한 베이스 점수 도출
             features = np.array([
                 1.0 if df['RSI'].iloc[-1] < 35 else 0.0,
@@ -302,7 +301,7 @@ def run_full_scan():
                 win_rate = 0.0
 
             # [ATR 기반 포지션 사이징]
-            atr = df['ATR'].iloc[-1]
+            atr = float(df['ATR'].iloc[-1])
             stop_loss = curr_p - (atr * 1.5)
             risk_per_share = curr_p - stop_loss if (curr_p - stop_loss) > 0 else 1
             max_risk_amount = TOTAL_CAPITAL * RISK_TOLERANCE_PER_TRADE
@@ -313,48 +312,135 @@ def run_full_scan():
             results.append({
                 "symbol": s, "price": curr_p, "rsi": float(df['RSI'].iloc[-1]), 
                 "drop": drop_rate, "is_vol": is_vol, "is_bb": is_bb_support,
-                "is_deadcat": is_deadcat, "is_v_rebound": is_v_rebound, "cmf": df['CMF'].iloc[-1],
+                "is_deadcat": is_deadcat, "is_v_rebound": is_v_rebound, "cmf": float(df['CMF'].iloc[-1]),
                 "external": external, "tech_score": tech_score, "win_rate": win_rate,
                 "target_price": curr_p + (atr * 3), "stop_loss": stop_loss,
                 "rec_shares": recommended_shares, "alloc_pct": alloc_pct
             })
+            closes[s] = df['Close']
+            signals[s] = (df['Volume'] > df['Volume'].rolling(5).mean() * 1.5) & (df['Close'] > df['Close'].shift(1))
             time.sleep(0.01)
         except Exception as e: continue
 
-    # ==========================================
-    # [6. 결과 집계 및 리포팅]
-    # ==========================================
-    hot_sectors = [k for k, v in sector_momentum.items() if v >= 2]
+    close_df = pd.DataFrame(closes)
+    sector_counts = sector_engine.accumulate(SECTOR_INDEX, close_df, pd.DataFrame(signals))
+    returns = pd.DataFrame(universe_closes).pct_change(fill_method=None).iloc[1:].tail(RISK_WINDOW)
+    return results, sector_counts, review_list, returns
+
+# ==========================================
+# [6. 결과 집계 및 리포팅]
+# ==========================================
+def cov_state_matches(engine, settled, settled_dates):
+    """저장된 버퍼 행이 이번에 받은 같은 일자의 수익률과 일치하는지 확인 (야후 사후 수정·분할 반영 지연 감지)"""
+    end = settled_dates.index(engine.last_date) + 1
+    stored, seen = engine.ordered_rows()
+    n = min(len(stored), end)
+    fresh = settled[engine.symbols].values[end - n:end]
+    have = seen[len(seen) - n:] & ~np.isnan(fresh)  # 저장 당시와 이번 다운로드 모두 값이 있는 칸만 비교
+    return bool(np.allclose(stored[len(stored) - n:][have], fresh[have]))
+
+def build_cov_engine(returns):
+    """
+    저장된 공분산 엔진 상태에 새로 확정된 거래일 수익률만 추가하여 반환 (데이터가 부족하면 None)
+    상태 파일이 없거나, 종목 구성이 바뀌었거나, 마지막 반영일이 윈도우 밖이거나,
+    저장된 행이 이번에 받은 과거 수익률과 다르면(사후 수정) 윈도우 전체로 콜드 스타트
+    마지막 행(당일)은 장중 미확정일 수 있어 저장 상태에는 넣지 않고 복사본에만 반영
+    엔진은 고정 유니버스(STOCKS) 기준이라 필터 탈락/다운로드 실패 종목은 0 수익률로 채워지고 콜드 스타트를 유발하지 않음
+    """
+    if returns is None or returns.empty or len(returns) < 3:
+        return None
+    returns = returns.reindex(columns=STOCKS)
+    dates = [str(d)[:10] for d in returns.index]
+    settled, settled_dates = returns.iloc[:-1], dates[:-1]
+
+    engine = None
+    if os.path.exists(COV_STATE_PATH):
+        try:
+            engine = risk_engine.CovarianceEngine.load(COV_STATE_PATH)
+        except Exception as e:
+            print(f"공분산 상태 로드 실패, 재구성합니다: {e}")
+
+    if (engine is not None and engine.window == RISK_WINDOW and set(engine.symbols) == set(STOCKS)
+            and engine.last_date in settled_dates and cov_state_matches(engine, settled, settled_dates)):
+        new_rows = settled[engine.symbols].iloc[settled_dates.index(engine.last_date) + 1:]
+        for date, row in zip(settled_dates[len(settled_dates) - len(new_rows):], new_rows.values):
+            engine.update(row, date)
+        print(f"🧮 공분산 엔진: 저장 상태에 {len(new_rows)}일 추가")
+    else:
+        engine = risk_engine.CovarianceEngine.from_returns(settled.columns, settled.values, RISK_WINDOW, settled_dates)
+        print("🧮 공분산 엔진: 콜드 스타트 (상태 없음/종목 구성 변경/과거 데이터 수정)")
+    try:
+        engine.save(COV_STATE_PATH)
+    except OSError as e:
+        print(f"공분산 상태 저장 실패: {e}")
+
+    today = engine.copy()
+    today.update(returns[engine.symbols].iloc[-1].values, dates[-1])
+    return today
+
+def format_pick(item, total_score, shares):
+    s = item['symbol']
+    upside_str = f"{item['external']['upside']}%" if item['external']['upside'] != "N/A" else "N/A"
+    
+    status_tag = ""
+    if item['is_deadcat']: status_tag = "⚠️ [데드캣 경고] "
+    elif item['is_v_rebound']: status_tag = "🚀 [V자 반등] "
+    elif item['cmf'] > 0.1: status_tag = "🐳 [세력매집] "
+
+    alloc_pct = ((shares * item['price']) / TOTAL_CAPITAL) * 100
+    adj_tag = f", 단독 {item['rec_shares']}주→상관조정" if shares != item['rec_shares'] else ""
+    
+    return (f"{status_tag}🔥 **`{s}`** (총점:{total_score:.1f})\n"
+            f"📍 Price: ${item['price']:.2f} (RSI:{item['rsi']:.1f})\n"
+            f"🎯 TP: ${item['target_price']:.2f} | 🆙 Upside: {upside_str} {item['external']['upside_tag']}\n"
+            f"🛑 손절가: ${item['stop_loss']:.2f} | 🏆 과거 승률: {item['win_rate']:.1f}%\n"
+            f"⚖️ 권장 비중: 자산의 {alloc_pct:.1f}% ({shares}주{adj_tag})\n"
+            f"📊 뉴스:{item['external']['sentiment']} | 낙폭:{item['drop']:.1f}% | 🏛 실적:{item['external']['earnings']}\n"
+            f"🔗 https://tossinvest.com/stocks/{s}")
+
+def build_report(results, sector_counts, review_list, returns, vix, m_perf, now):
+    """스캔 결과로 핫섹터/테마 가점/등급을 산출하고, 추천 종목 수량을 공동 조정한 텔레그램 리포트 본문을 반환"""
+    is_risky = float(vix) > 24.0 or float(m_perf) < -1.5
+    risk_mode = "⚠️방어운전" if is_risky else "✅안정적"
+    score_min = 45 if risk_mode == "⚠️방어운전" else 30
+
+    super_buys, strong_buys, normal_buys = [], [], []
+    sector_series = sector_engine.breadth(sector_counts)
+    hot_sectors = sector_engine.hot_sectors(sector_series)
     
     for item in results:
         s = item['symbol']
-        theme_bonus = 10 if any(s in SECTORS[hs] for hs in hot_sectors) else 0
+        theme_bonus = 10 if any(sec in hot_sectors for sec in SECTOR_INDEX.sectors_of(s)) else 0
         
-        # 합산 및 메시지 작성
+        # 합산 및 등급 분류
         total_score = item['tech_score'] + item['external']['score'] + theme_bonus
-        upside_str = f"{item['external']['upside']}%" if item['external']['upside'] != "N/A" else "N/A"
-        
-        status_tag = ""
-        if item['is_deadcat']: status_tag = "⚠️ [데드캣 경고] "
-        elif item['is_v_rebound']: status_tag = "🚀 [V자 반등] "
-        elif item['cmf'] > 0.1: status_tag = "🐳 [세력매집] "
-        
-        msg = (f"{status_tag}🔥 **`{s}`** (총점:{total_score:.1f})\n"
-               f"📍 Price: ${item['price']:.2f} (RSI:{item['rsi']:.1f})\n"
-               f"🎯 TP: ${item['target_price']:.2f} | 🆙 Upside: {upside_str} {item['external']['upside_tag']}\n"
-               f"🛑 손절가: ${item['stop_loss']:.2f} | 🏆 과거 승률: {item['win_rate']:.1f}%\n"
-               f"⚖️ 권장 비중: 자산의 {item['alloc_pct']:.1f}% ({item['rec_shares']}주)\n"
-               f"📊 뉴스:{item['external']['sentiment']} | 낙폭:{item['drop']:.1f}% | 🏛 실적:{item['external']['earnings']}\n"
-               f"🔗 https://tossinvest.com/stocks/{s}")
 
         if "⚠️" in item['external']['earnings']: continue
         
         if total_score >= 85 and item['is_vol'] and risk_mode == "✅안정적":
-            super_buys.append(msg)
+            super_buys.append((item, total_score))
         elif total_score >= 65:
-            strong_buys.append(msg)
+            strong_buys.append((item, total_score))
         elif total_score >= score_min:
-            normal_buys.append(msg)
+            normal_buys.append((item, total_score))
+
+    # 등급 내 총점 내림차순(동점은 종목명)으로 정렬 후 상위만 노출 → 스캔/샤드 순서와 무관한 결과
+    for tier in (super_buys, strong_buys, normal_buys):
+        tier.sort(key=lambda x: (-x[1], x[0]['symbol']))
+    super_buys, strong_buys, normal_buys = super_buys[:3], strong_buys[:5], normal_buys[:8]
+
+    # [상관관계 기반 공동 포지션 사이징] 리포트에 실리는 추천 종목 전체를 하나의 포트폴리오로 보고 수량 조정
+    picks = [item for item, _ in super_buys + strong_buys + normal_buys]
+    engine = build_cov_engine(returns)
+    if engine is not None:
+        sizes, port_vol = risk_engine.size_positions_jointly(engine, picks, TOTAL_CAPITAL, PORTFOLIO_RISK_BUDGET)
+        risk_line = f"🧮 추천 포트폴리오 일간 변동성: ${port_vol:,.0f} (한도 {PORTFOLIO_RISK_BUDGET*100}%, 수축 δ={engine.shrinkage_intensity():.2f})"
+    else:
+        sizes = {item['symbol']: item['rec_shares'] for item in picks}
+        risk_line = "🧮 상관 리스크 조정: 데이터 부족 (단독 ATR 사이징)"
+
+    def cards(tier):
+        return "\n\n".join(format_pick(item, score, sizes[item['symbol']]) for item, score in tier)
 
     # 텔레그램 메시지 포맷팅
     header = [
@@ -362,29 +448,110 @@ def run_full_scan():
         f"📅 {now.strftime('%Y-%m-%d %H:%M')} | {risk_mode}",
         f"📉 VIX: {vix:.2f} | NASDAQ: {m_perf:+.2f}%",
         f"💼 기준 자산: ${TOTAL_CAPITAL:,.0f} (1회 리스크 {RISK_TOLERANCE_PER_TRADE*100}%)",
+        risk_line,
         f"🚩 Hot Sectors: {', '.join(hot_sectors) if hot_sectors else '없음'}",
+        f"🔄 Sector RS: {sector_engine.rotation_summary(sector_series) or '데이터 부족'}",
         "━━━━━━━━━━━━━━",
         f"📊 **[전일 RSI 과매도 적중률]**\n" + (", ".join(review_list[:8]) if review_list else "데이터 부족"),
         "━━━━━━━━━━━━━━"
     ]
     
-    full_text = "\n".join(header + 
-                ([f"🚀 **[SUPER BUY]** - 강력 추천\n" + "\n\n".join(super_buys[:3])] if super_buys else []) +
-                ([f"\n💎 **[STRONG BUY]** - 매수 유효\n" + "\n\n".join(strong_buys[:5])] if strong_buys else []) +
-                ([f"\n🔍 **[NORMAL BUY]** - 관망/소액\n" + "\n\n".join(normal_buys[:8])] if normal_buys else []) +
+    return "\n".join(header + 
+                ([f"🚀 **[SUPER BUY]** - 강력 추천\n" + cards(super_buys)] if super_buys else []) +
+                ([f"\n💎 **[STRONG BUY]** - 매수 유효\n" + cards(strong_buys)] if strong_buys else []) +
+                ([f"\n🔍 **[NORMAL BUY]** - 관망/소액\n" + cards(normal_buys)] if normal_buys else []) +
                 ["━━━━━━━━━━━━━━", f"✅ {len(results)}개 종목 분석 완료"])
 
+def send_telegram(full_text):
     print("\n텔레그램 전송 중...")
     for part in [full_text[i:i+4000] for i in range(0, len(full_text), 4000)]:
         requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", 
                       json={"chat_id": CHAT_ID, "text": part, "parse_mode": "Markdown", "disable_web_page_preview": True})
     print("완료되었습니다.")
 
-if __name__ == "__main__":
-    run_full_scan()
-
+def run_full_scan():
+    print("🚀 NASDAQ Master-Quant System Starting...")
+    if not TELEGRAM_TOKEN or not CHAT_ID: 
+        return print("토큰 설정 확인 필요")
+        
+    kst = pytz.timezone('Asia/Seoul')
+    now = datetime.now(kst)
+    
+    vix, m_perf = get_market_status()
+    is_risky = float(vix) > 24.0 or float(m_perf) < -1.5
 
+    results, sector_counts, review_list, returns = scan_symbols(STOCKS, is_risky)
+    send_telegram(build_report(results, sector_counts, review_list, returns, vix, m_perf, now))
 
+# ==========================================
+# [7. 분산 스캔 (샤드 스캔 → 병합 리포트)]
+# ==========================================
+def run_market_status(out_path):
+    """샤드 스캔 전 단계: 시장 상태를 1회만 조회해 저장 (모든 샤드가 같은 가중치로 채점하도록)"""
+    vix, m_perf = get_market_status()
+    shard_io.write_market_status(out_path, "US", {"vix": float(vix), "m_perf": float(m_perf)})
+    print(f"💾 VIX {float(vix):.2f} | NASDAQ {float(m_perf):+.2f}% 저장: {out_path}")
+
+def run_shard_scan(shard_idx, num_shards, out_path, market_path):
+    """전체 유니버스 중 k/N 구간만 스캔하여 부분 결과 파일로 저장 (텔레그램 전송 없음)"""
+    print(f"🧩 NASDAQ Shard Scan {shard_idx}/{num_shards} Starting...")
+    market_status = shard_io.load_market_status(market_path, "US")
+    vix, m_perf = market_status["vix"], market_status["m_perf"]
+    is_risky = float(vix) > 24.0 or float(m_perf) < -1.5
 
+    symbols = shard_io.shard_symbols(STOCKS, shard_idx, num_shards)
+    results, sector_counts, review_list, returns = scan_symbols(symbols, is_risky)
+    shard_io.write_partial(out_path, "US", shard_idx, num_shards, {
+        "market_status": market_status, "num_symbols": len(symbols),
+        "sector_counts": sector_engine.to_dict(sector_counts), "review_list": review_list, "results": results,
+        "returns": {"dates": [str(d)[:10] for d in returns.index], "columns": returns.to_dict(orient="list")}
+    })
+    print(f"💾 {len(results)}개 결과 저장: {out_path}")
+
+def run_merge_report(paths):
+    """샤드 결과 파일들을 병합해 단일 프로세스 실행과 동일한 리포트를 전송"""
+    print("🔗 NASDAQ Shard Merge Starting...")
+    if not TELEGRAM_TOKEN or not CHAT_ID: 
+        return print("토큰 설정 확인 필요")
 
+    partials = shard_io.load_partials(paths, "US")  # 샤드 간 시장 상태가 다르면 ValueError
+    vix, m_perf = partials[0]["market_status"]["vix"], partials[0]["market_status"]["m_perf"]
+
+    results = shard_io.merge_lists(partials, "results")
+    sector_counts = sector_engine.combine([sector_engine.from_dict(p["sector_counts"]) for p in partials])
+    review_list = shard_io.merge_lists(partials, "review_list")
+    returns = pd.concat([pd.DataFrame(p["returns"]["columns"], index=pd.to_datetime(p["returns"]["dates"]))
+                         for p in partials], axis=1).sort_index().tail(RISK_WINDOW)
+
+    now = datetime.now(pytz.timezone('Asia/Seoul'))
+    send_telegram(build_report(results, sector_counts, review_list, returns, vix, m_perf, now))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NASDAQ Master-Quant 스캐너")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--market-status", metavar="FILE", help="샤드 스캔 전 시장 상태(VIX/NASDAQ)를 1회 조회해 저장")
+    mode.add_argument("--shard", metavar="K/N", help="전체 유니버스 중 K번째(0부터) 샤드만 스캔하여 --out 파일로 저장 (--market 필수)")
+    mode.add_argument("--merge", nargs="+", metavar="FILE", help="샤드 결과 파일들을 병합하여 리포트 전송")
+    parser.add_argument("--market", metavar="FILE", help="--market-status 로 저장한 시장 상태 파일 (모든 샤드 공통)")
+    parser.add_argument("--out", help="샤드 결과 저장 경로 (기본: partial_us_K.json)")
+    args = parser.parse_args()
+    if args.shard:
+        if not args.market:
+            parser.error("--shard 는 --market 시장 상태 파일이 필요합니다 (먼저 --market-status 실행)")
+        try:
+            args.shard = shard_io.parse_shard_spec(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
 
+if __name__ == "__main__":
+    args = parse_args()
+    if args.market_status:
+        run_market_status(args.market_status)
+    elif args.shard:
+        k, n = args.shard
+        run_shard_scan(k, n, args.out or f"partial_us_{k}.json", args.market)
+    elif args.merge:
+        run_merge_report(args.merge)
+    else:
+        run_full_scan()
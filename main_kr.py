@@ -1,4 +1,5 @@
 import os
+import argparse
 import yfinance as yf
 import pandas as pd
 import requests
@@ -7,6 +8,8 @@ import json
 from datetime import datetime, timedelta
 import pytz
 import google.generativeai as genai
+import shard_io
+import sector_engine
 
 # ==========================================
 # 1. 환경 설정 및 종목 리스트 (100개 유지)
@@ -28,6 +31,7 @@ SECTORS = {
     "금융/지주": ["105560.KS", "055550.KS", "086790.KS", "138040.KS", "000810.KS", "032830.KS", "003550.KS", "034730.KS"],
     "엔터/게임": ["352820.KS", "259960.KS", "041510.KQ", "035900.KQ", "251270.KS", "036570.KS", "112040.KQ", "078340.KQ"]
 }
+SECTOR_INDEX = sector_engine.SectorIndex(SECTORS)  # 종목코드→섹터 역인덱스
 
 KR_STOCKS = [
     ("삼성전자", "005930.KS"), ("SK하이닉스", "000660.KS"), ("LG엔솔", "373220.KS"), ("삼성바이오", "207940.KS"), ("현대차", "005380.KS"),
@@ -103,29 +107,23 @@ def get_yesterday_backtest():
     except: return 0.0
 
 # --- 메인 실행 엔진 ---
-def run_full_pro_system():
-    print("🚀 국장 PRO 퀀트 시스템(리포트 연동형) 가동 중...")
-    if not TELEGRAM_TOKEN or not CHAT_ID: return
-    kst = pytz.timezone('Asia/Seoul'); now = datetime.now(kst)
-    
-    y_perf = get_yesterday_backtest()
-    risk_mode = "⚠️방어운전" if y_perf < -1.0 else "✅안정적"
-    score_threshold = 45 if y_perf < -0.5 else 30
-    
+def scan_stocks(stocks):
+    """(종목명, 코드) 리스트를 스캔하여 (analysis_results, sector_counts) 반환 (샤드 단위로도 호출됨)"""
     analysis_results = []
-    sector_momentum = {name: 0 for name in SECTORS.keys()}
+    closes, signals = {}, {}  # 섹터 엔진 입력용 (종가, 양매수/저점매집 신호 시계열)
 
-    for s_name, s_code in KR_STOCKS:
+    for s_name, s_code in stocks:
         try:
             t_obj = yf.Ticker(s_code)
             df = flatten_df(t_obj.history(period="100d"))
             if len(df) < 20: continue
             
             curr_p = float(df['Close'].iloc[-1])
-            rsi = calculate_rsi(df['Close']).iloc[-1]
-            mfi = calculate_mfi(df).iloc[-1]
+            rsi = float(calculate_rsi(df['Close']).iloc[-1])
+            mfi_series = calculate_mfi(df)
+            mfi = float(mfi_series.iloc[-1])
             high_52 = df['High'].max()
-            drop_rate = (1 - (curr_p / high_52)) * 100
+            drop_rate = float((1 - (curr_p / high_52)) * 100)
             
             # 수급 엔진
             vol_spike = df['Volume'].iloc[-1] > df['Volume'].rolling(10).mean().iloc[-1] * 1.8
@@ -137,9 +135,10 @@ def run_full_pro_system():
             elif mfi < 30:
                 supply_tag = "🔥저점매집"; s_score = 25
             
-            if s_score > 0:
-                for s_tile, codes in SECTORS.items():
-                    if s_code in codes: sector_momentum[s_tile] += 1
+            # 당일 s_score > 0 조건을 전 기간 시계열로 (섹터 브레드스용)
+            vol_series = df['Volume'] > df['Volume'].rolling(10).mean() * 1.8
+            closes[s_code] = df['Close']
+            signals[s_code] = (vol_series & (df['Close'] > df['Close'].shift(1)) & (mfi_series < 50)) | (mfi_series < 30)
 
             # [증권사 리포트 연동 추가]
             broker_target, broker_opinion = get_analyst_consensus(t_obj)
@@ -157,32 +156,43 @@ def run_full_pro_system():
                 if 0 <= days <= 7: e_status = f"⚠️D-{days}"
             except: pass
 
+            # 리포트 단계에서 쓰는 ATR은 미리 계산 (샤드 파일에 df를 싣지 않기 위함)
+            atr = float((df['High'] - df['Low']).rolling(14).mean().iloc[-1])
+
             analysis_results.append({
                 "name": s_name, "code": s_code, "price": curr_p, "rsi": rsi, "mfi": mfi,
                 "supply": supply_tag, "s_score": s_score, "e_status": e_status, 
                 "drop": drop_rate, "broker_target": broker_target, "broker_opinion": broker_opinion,
-                "broker_upside": broker_upside, "broker_bonus": broker_bonus,
-                "df": df, "t_obj": t_obj
+                "broker_upside": broker_upside, "broker_bonus": broker_bonus, "atr": atr
             })
             time.sleep(0.01)
         except: continue
 
-    hot_sectors = [k for k, v in sector_momentum.items() if v >= 2]
+    sector_counts = sector_engine.accumulate(SECTOR_INDEX, pd.DataFrame(closes), pd.DataFrame(signals))
+    return analysis_results, sector_counts
+
+def build_report(analysis_results, sector_counts, y_perf, now):
+    """핫섹터/테마 가점/AI 뉴스 분석을 반영해 점수순 리포트 본문을 반환"""
+    risk_mode = "⚠️방어운전" if y_perf < -1.0 else "✅안정적"
+    score_threshold = 45 if y_perf < -0.5 else 30
+
+    sector_series = sector_engine.breadth(sector_counts)
+    hot_sectors = sector_engine.hot_sectors(sector_series)
     final_cards = []
 
     for item in analysis_results:
-        theme_bonus = 15 if any(item['code'] in SECTORS[hs] for hs in hot_sectors) else 0
+        theme_bonus = 15 if any(sec in hot_sectors for sec in SECTOR_INDEX.sectors_of(item['code'])) else 0
         
         sentiment, ai_score = "중립", 0
         if item['rsi'] < 42 or item['s_score'] > 0 or theme_bonus > 0:
-            sentiment, ai_score = get_ai_analysis(item['name'], item['t_obj'])
+            sentiment, ai_score = get_ai_analysis(item['name'], yf.Ticker(item['code']))
             time.sleep(0.4)
 
         # 최종 점수 합산 (리포트 가점 포함)
         total_score = item['s_score'] + ai_score + theme_bonus + item['broker_bonus'] + \
                       (20 if item['rsi'] < 33 else 0) + (10 if item['drop'] > 35 else 0)
         
-        atr = (item['df']['High'] - item['df']['Low']).rolling(14).mean().iloc[-1]
+        atr = item['atr']
         t1, t2, stop = item['price'] + (atr * 1.5), item['price'] + (atr * 3.0), item['price'] - (atr * 1.2)
         
         if total_score >= score_threshold or item['rsi'] < 30:
@@ -205,15 +215,83 @@ def run_full_pro_system():
     
     header = f"🇰🇷 *KOREA STOCK QUANT PRO*\n📅 {now.strftime('%m-%d %H:%M')} | {risk_mode}\n"
     if hot_sectors: header += f"🚩 주도섹터: {', '.join(hot_sectors)}\n"
+    rotation = sector_engine.rotation_summary(sector_series)
+    if rotation: header += f"🔄 섹터강도: {rotation}\n"
     header += f"📈 어제 시장변동: {y_perf:+.2f}%\n━━━━━━━━━━━━━━\n\n"
     
     body = "\n\n".join([c[1] for c in final_cards[:15]])
-    full_message = header + body
+    return header + body
 
+def send_telegram(full_message):
     requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", 
                   json={"chat_id": CHAT_ID, "text": full_message, "parse_mode": "Markdown", "disable_web_page_preview": True})
 
-if __name__ == "__main__":
-    run_full_pro_system()
+def run_full_pro_system():
+    print("🚀 국장 PRO 퀀트 시스템(리포트 연동형) 가동 중...")
+    if not TELEGRAM_TOKEN or not CHAT_ID: return
+    kst = pytz.timezone('Asia/Seoul'); now = datetime.now(kst)
+    
+    y_perf = float(get_yesterday_backtest())
+    analysis_results, sector_counts = scan_stocks(KR_STOCKS)
+    send_telegram(build_report(analysis_results, sector_counts, y_perf, now))
+
+# --- 분산 스캔 (샤드 스캔 → 병합 리포트) ---
+def run_market_status(out_path):
+    """샤드 스캔 전 단계: 전일 코스피 변동을 1회만 조회해 저장 (모든 샤드가 공유)"""
+    y_perf = float(get_yesterday_backtest())
+    shard_io.write_market_status(out_path, "KR", {"y_perf": y_perf})
+    print(f"💾 어제 시장변동 {y_perf:+.2f}% 저장: {out_path}")
 
+def run_shard_scan(shard_idx, num_shards, out_path, market_path):
+    """KR_STOCKS 중 k/N 구간만 스캔하여 부분 결과 파일로 저장 (AI 분석/텔레그램 전송은 병합 단계에서)"""
+    print(f"🧩 국장 샤드 스캔 {shard_idx}/{num_shards} 가동 중...")
+    market_status = shard_io.load_market_status(market_path, "KR")
+    stocks = shard_io.shard_symbols(KR_STOCKS, shard_idx, num_shards)
+    analysis_results, sector_counts = scan_stocks(stocks)
+    shard_io.write_partial(out_path, "KR", shard_idx, num_shards, {
+        "market_status": market_status, "num_symbols": len(stocks),
+        "sector_counts": sector_engine.to_dict(sector_counts), "results": analysis_results
+    })
+    print(f"💾 {len(analysis_results)}개 결과 저장: {out_path}")
 
+def run_merge_report(paths):
+    """샤드 결과 파일들을 병합해 단일 프로세스 실행과 동일한 리포트를 전송"""
+    print("🔗 국장 샤드 병합 리포트 가동 중...")
+    if not TELEGRAM_TOKEN or not CHAT_ID: return
+    partials = shard_io.load_partials(paths, "KR")  # 샤드 간 시장 상태가 다르면 ValueError
+    y_perf = partials[0]["market_status"]["y_perf"]
+    analysis_results = shard_io.merge_lists(partials, "results")
+    sector_counts = sector_engine.combine([sector_engine.from_dict(p["sector_counts"]) for p in partials])
+
+    now = datetime.now(pytz.timezone('Asia/Seoul'))
+    send_telegram(build_report(analysis_results, sector_counts, y_perf, now))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="국장 PRO 퀀트 스캐너")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--market-status", metavar="FILE", help="샤드 스캔 전 시장 상태(전일 코스피 변동)를 1회 조회해 저장")
+    mode.add_argument("--shard", metavar="K/N", help="KR_STOCKS 중 K번째(0부터) 샤드만 스캔하여 --out 파일로 저장 (--market 필수)")
+    mode.add_argument("--merge", nargs="+", metavar="FILE", help="샤드 결과 파일들을 병합하여 리포트 전송")
+    parser.add_argument("--market", metavar="FILE", help="--market-status 로 저장한 시장 상태 파일 (모든 샤드 공통)")
+    parser.add_argument("--out", help="샤드 결과 저장 경로 (기본: partial_kr_K.json)")
+    args = parser.parse_args()
+    if args.shard:
+        if not args.market:
+            parser.error("--shard 는 --market 시장 상태 파일이 필요합니다 (먼저 --market-status 실행)")
+        try:
+            args.shard = shard_io.parse_shard_spec(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.market_status:
+        run_market_status(args.market_status)
+    elif args.shard:
+        k, n = args.shard
+        run_shard_scan(k, n, args.out or f"partial_kr_{k}.json", args.market)
+    elif args.merge:
+        run_merge_report(args.merge)
+    else:
+        run_full_pro_system()
@@ -0,0 +1,157 @@
+import os
+import numpy as np
+
+# ==========================================
+# [상관관계 기반 포트폴리오 리스크 엔진]
+# n×n 공분산 행렬을 만들지 않고 W×n 수익률 버퍼 + W×W 그램 행렬(R·Rᵀ)만 유지
+# 공분산 = 저랭크(rank ≤ W) 표본 공분산 + 대각 타깃으로의 수축(Shrinkage)
+# 상태는 save()/load()로 실행 간 유지하고, 매 실행마다 새 거래일 행만 update()로 추가
+# ==========================================
+_POWERS = np.arange(1, 5)[:, None]
+
+class CovarianceEngine:
+    """롤링 윈도우 수익률 공분산을 한 행(하루)씩 증분 갱신 (갱신 1회당 O(W·n))"""
+
+    def __init__(self, symbols, window=60):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.window = window
+        self.count = 0
+        self.last_date = None  # 마지막으로 반영한 거래일 (YYYY-MM-DD)
+        self._pos = 0
+        self._buf = np.zeros((window, len(self.symbols)))
+        self._seen = np.zeros((window, len(self.symbols)), dtype=bool)  # 실제 관측된 칸 (NaN→0 대체와 구분)
+        self._gram = np.zeros((window, window))
+        self._moments = np.zeros((4, len(self.symbols)))  # 종목별 Σr, Σr², Σr³, Σr⁴
+
+    @classmethod
+    def from_returns(cls, symbols, rows, window=60, dates=None):
+        """콜드 스타트: (일자 × 종목) 수익률 행렬의 마지막 window개 행으로 엔진 초기화 (저장 상태가 없거나 종목 구성이 바뀐 경우)"""
+        engine = cls(symbols, window)
+        rows = np.asarray(rows, dtype=float)[-window:]
+        dates = list(dates)[-window:] if dates is not None else [None] * len(rows)
+        for row, date in zip(rows, dates):
+            engine.update(row, date)
+        return engine
+
+    @classmethod
+    def load(cls, path):
+        """save()로 저장한 상태 복원"""
+        with np.load(path) as d:
+            engine = cls(d["symbols"].tolist(), d["buf"].shape[0])
+            engine._buf, engine._gram, engine._moments = d["buf"], d["gram"], d["moments"]
+            engine._seen = d["seen"] if "seen" in d else np.ones_like(d["buf"], dtype=bool)
+            engine._pos, engine.count = int(d["pos"]), int(d["count"])
+            engine.last_date = str(d["last_date"]) or None
+        return engine
+
+    def save(self, path):
+        """엔진 상태(버퍼/그램/모멘트/위치/종목)를 npz로 저장 (원자적 교체)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, symbols=np.array(self.symbols, dtype=str), buf=self._buf, seen=self._seen, gram=self._gram,
+                     moments=self._moments, pos=self._pos, count=self.count, last_date=self.last_date or "")
+        os.replace(tmp_path, path)
+
+    def copy(self):
+        engine = CovarianceEngine(self.symbols, self.window)
+        engine._buf, engine._gram, engine._moments = self._buf.copy(), self._gram.copy(), self._moments.copy()
+        engine._seen = self._seen.copy()
+        engine._pos, engine.count, engine.last_date = self._pos, self.count, self.last_date
+        return engine
+
+    def ordered_rows(self):
+        """버퍼에 담긴 (수익률 행, 관측 여부 마스크)를 오래된 순서로 반환 (count × n, 마지막 행 = last_date)"""
+        if self.count < self.window:
+            return self._buf[:self.count], self._seen[:self.count]
+        order = np.r_[self._pos:self.window, 0:self._pos]
+        return self._buf[order], self._seen[order]
+
+    def update(self, returns, date=None):
+        """하루치 수익률 벡터(symbols 순서) 추가, 윈도우가 차면 가장 오래된 행을 밀어냄 (NaN은 0 수익률 처리)"""
+        raw = np.asarray(returns, dtype=float)
+        r = np.nan_to_num(raw)
+        slot = self._pos
+        if self.count == self.window:
+            self._moments -= self._buf[slot] ** _POWERS
+        else:
+            self.count += 1
+        self._buf[slot] = r
+        self._seen[slot] = ~np.isnan(raw)
+        self._moments += r ** _POWERS
+
+        g = self._buf @ r
+        self._gram[slot, :] = g
+        self._gram[:, slot] = g
+
+        self._pos = (slot + 1) % self.window
+        self.last_date = date
+        # 윈도우 한 바퀴마다 누적 모멘트를 재계산하여 부동소수점 오차 누적 방지 (분할상환 O(n))
+        if self._pos == 0:
+            self._moments = (self._buf ** _POWERS[:, :, None]).sum(axis=1)
+
+    def _centered_gram(self):
+        c = self.count
+        h = np.eye(c) - 1.0 / c
+        return h @ self._gram[:c, :c] @ h
+
+    def shrinkage_intensity(self):
+        """대각 타깃으로의 최적 수축 강도 δ (Schäfer-Strimmer), 유니버스 전체 통계로 O(W²·n) 계산"""
+        c = self.count
+        if c < 3:
+            return 1.0
+        s1, s2, s3, s4 = self._moments
+        m = s1 / c
+        gc = self._centered_gram()
+
+        w_diag = np.maximum(s2 - s1 * m, 0) / c                          # w̄_ii
+        z4 = s4 - 4 * m * s3 + 6 * m ** 2 * s2 - 4 * m ** 3 * s1 + c * m ** 4  # Σ_t z_ti⁴
+        w_off_sq = (gc ** 2).sum() / c ** 2 - (w_diag ** 2).sum()          # Σ_{i≠j} w̄_ij²
+
+        if w_off_sq <= 0:
+            return 1.0
+        var_off = c / (c - 1) ** 3 * ((np.diag(gc) ** 2).sum() - z4.sum() - c * w_off_sq)
+        delta = var_off / ((c / (c - 1)) ** 2 * w_off_sq)
+        return float(np.clip(delta, 0.0, 1.0))
+
+    def covariance(self, symbols, delta=None):
+        """지정 종목들만의 수축 공분산 부분행렬 (k×k), 비대각 원소에만 (1-δ) 적용"""
+        c = self.count
+        cols = [self.index[s] for s in symbols]
+        z = self._buf[:c, cols] - self._moments[0, cols] / c
+        cov = z.T @ z / (c - 1)
+        if delta is None:
+            delta = self.shrinkage_intensity()
+        diag = np.diag(cov).copy()
+        cov *= (1 - delta)
+        np.fill_diagonal(cov, diag)
+        return cov
+
+def size_positions_jointly(engine, picks, capital, risk_budget):
+    """
+    ATR 기준 단독 수량(rec_shares)을 상관관계 반영해 공동 조정
+    1) 양(+)의 상관 종목이 많을수록 1/sqrt(1+Σρ⁺) 만큼 축소 (완전상관 k종목 ≈ 독립 k종목과 같은 리스크)
+    2) 포트폴리오 일간 변동성이 capital × risk_budget 을 넘으면 전체를 비례 축소
+    반환: ({symbol: shares}, 조정 후 포트폴리오 일간 변동성($))
+    """
+    sizes = {p['symbol']: p['rec_shares'] for p in picks}
+    known = [p for p in picks if p['symbol'] in engine.index and p['rec_shares'] > 0]
+    if not known or engine.count < 3:
+        return sizes, 0.0
+
+    cov = engine.covariance([p['symbol'] for p in known])
+    vol = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.nan_to_num(cov / np.outer(vol, vol))
+    crowding = 1 + np.clip(corr, 0, None).sum(axis=1) - np.clip(np.diag(corr), 0, None)
+
+    prices = np.array([p['price'] for p in known])
+    value = np.array([p['rec_shares'] for p in known]) * prices / np.sqrt(crowding)
+    port_vol = float(np.sqrt(max(value @ cov @ value, 0)))
+    if port_vol > capital * risk_budget:
+        value *= capital * risk_budget / port_vol
+        port_vol = capital * risk_budget
+
+    for p, v in zip(known, value):
+        sizes[p['symbol']] = int(v / p['price'])
+    return sizes, port_vol
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# [섹터 브레드스 & 로테이션 엔진]
+# 종목→섹터 인덱스 + (일자 × 종목) 행렬과 소속 행렬의 곱으로 섹터별 시계열을 한 번에 계산
+# 섹터 집계는 합산 가능한 카운트로 보관하므로 샤드별 결과를 더하기만 하면 전체 결과와 동일
+# ==========================================
+UNIVERSE = "_ALL"  # 상대강도 기준이 되는 전체 유니버스 가상 섹터
+COUNT_STATS = ["n_obs", "n_signal", "n_ma", "n_above", "n_ret", "ret_sum"]
+
+class SectorIndex:
+    """SECTORS 딕셔너리로부터 종목→섹터 역인덱스와 (종목 × 섹터) 소속 행렬 생성"""
+
+    def __init__(self, sectors):
+        self.sectors = list(sectors.keys())
+        self.symbol_sectors = {}
+        for name, members in sectors.items():
+            for s in members:
+                self.symbol_sectors.setdefault(s, []).append(name)
+
+    def sectors_of(self, symbol):
+        return self.symbol_sectors.get(symbol, [])
+
+    def membership(self, symbols):
+        """(종목 × [섹터..., _ALL]) 0/1 행렬 (중복 소속 허용)"""
+        col = {name: j for j, name in enumerate(self.sectors)}
+        m = np.zeros((len(symbols), len(self.sectors) + 1))
+        m[:, -1] = 1.0
+        for i, s in enumerate(symbols):
+            for name in self.sectors_of(s):
+                m[i, col[name]] = 1.0
+        return m
+
+def accumulate(index, closes, signals, ma_window=20, ret_window=20):
+    """
+    (일자 × 종목) 종가/수급 신호 행렬을 섹터별 합산 카운트 시계열로 변환
+    n_obs/n_signal: 신호(거래량 급증 등) 브레드스, n_ma/n_above: MA20 상회 브레드스, n_ret/ret_sum: 상대강도용 수익률 합
+    """
+    cols = index.sectors + [UNIVERSE]
+    if closes.empty:
+        return {k: pd.DataFrame(columns=cols, dtype=float) for k in COUNT_STATS}
+
+    signals = signals.reindex_like(closes)
+    m = index.membership(list(closes.columns))
+    ma = closes.rolling(ma_window).mean()
+    ret = closes.pct_change(ret_window, fill_method=None)
+
+    frames = {
+        "n_obs": closes.notna() & signals.notna(),
+        "n_signal": signals.fillna(False).astype(bool),
+        "n_ma": ma.notna(),
+        "n_above": closes > ma,
+        "n_ret": ret.notna(),
+        "ret_sum": ret.fillna(0.0),
+    }
+    return {k: pd.DataFrame(v.values.astype(float) @ m, index=closes.index, columns=cols)
+            for k, v in frames.items()}
+
+def combine(counts_list):
+    """샤드별 카운트를 일자 기준으로 정렬해 합산"""
+    return {k: pd.concat([c[k] for c in counts_list]).groupby(level=0).sum().sort_index()
+            for k in COUNT_STATS}
+
+def to_dict(counts):
+    """JSON 저장용 변환 (샤드 부분 결과 파일)"""
+    dates = counts["n_obs"].index
+    return {"dates": [str(d)[:10] for d in dates],
+            "stats": {k: counts[k].to_dict(orient="list") for k in COUNT_STATS}}
+
+def from_dict(data):
+    dates = pd.to_datetime(data["dates"])
+    return {k: pd.DataFrame(data["stats"][k], index=dates, dtype=float) for k in COUNT_STATS}
+
+def breadth(counts, rank_lookback=5):
+    """
+    합산 카운트로부터 섹터별 지표 시계열 산출 (모두 일자 × 섹터 DataFrame)
+    above_ma20: MA20 상회 비율 | spike_count/spike_breadth: 신호 종목 수/비율
+    rs: 섹터 평균 수익률 - 유니버스 평균 수익률 | rank: 상대강도 순위(1=최강) | rank_change: lookback일 전 대비 순위 상승폭
+    """
+    c = {k: v.drop(columns=UNIVERSE) for k, v in counts.items()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_ret = c["ret_sum"] / c["n_ret"].replace(0, np.nan)
+        universe_ret = counts["ret_sum"][UNIVERSE] / counts["n_ret"][UNIVERSE].replace(0, np.nan)
+        rs = avg_ret.sub(universe_ret, axis=0)
+        rank = rs.rank(axis=1, ascending=False, method="min")
+        return {
+            "above_ma20": c["n_above"] / c["n_ma"].replace(0, np.nan),
+            "spike_count": c["n_signal"],
+            "spike_breadth": c["n_signal"] / c["n_obs"].replace(0, np.nan),
+            "rs": rs,
+            "rank": rank,
+            "rank_change": rank.shift(rank_lookback) - rank,
+        }
+
+def hot_sectors(series, min_spikes=2):
+    """당일 신호 종목이 min_spikes개 이상이면서 상대강도 순위가 밀리지 않은(rank_change >= 0) 섹터"""
+    if series["spike_count"].empty:
+        return []
+    spikes = series["spike_count"].iloc[-1]
+    rank_change = series["rank_change"].iloc[-1].fillna(0)
+    return [name for name in spikes.index if spikes[name] >= min_spikes and rank_change[name] >= 0]
+
+def rotation_summary(series, top=5):
+    """당일 상대강도 순위 요약 문자열 (예: SEMICON#1(+2) 60%)"""
+    if series["rank"].empty:
+        return ""
+    rank = series["rank"].iloc[-1].dropna().sort_values()
+    change = series["rank_change"].iloc[-1].fillna(0)
+    above = series["above_ma20"].iloc[-1].fillna(0)
+    return ", ".join(f"{name}#{int(r)}({int(change[name]):+d}) {above[name]*100:.0f}%"
+                     for name, r in rank.head(top).items())
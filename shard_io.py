@@ -0,0 +1,71 @@
+import json
+import os
+
+# ==========================================
+# [샤드 분할 스캔 공용 유틸리티]
+# main.py / main_kr.py 의 "shard k/N 스캔" 과 "merge 리포트" 모드가 공유
+# ==========================================
+PARTIAL_VERSION = 1
+
+def parse_shard_spec(spec):
+    """'k/N' 형식의 샤드 지정 문자열을 (k, N) 튜플로 변환 (k는 0부터 시작)"""
+    try:
+        k, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"샤드 형식 오류: '{spec}' (예: 0/4)")
+    if n < 1 or not 0 <= k < n:
+        raise ValueError(f"샤드 범위 오류: '{spec}' (0 <= k < N)")
+    return k, n
+
+def shard_symbols(symbols, shard_idx, num_shards):
+    """종목 리스트를 연속 구간으로 분할 (샤드 순서대로 이어 붙이면 원본 순서가 복원됨)"""
+    n = len(symbols)
+    return symbols[shard_idx * n // num_shards:(shard_idx + 1) * n // num_shards]
+
+def write_market_status(path, market, status):
+    """샤드 실행 전 1회 조회한 시장 상태(가중치/방어운전 판정 입력)를 파일로 저장 → 모든 샤드가 공유"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": PARTIAL_VERSION, "market": market, "market_status": status}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_market_status(path, market):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != PARTIAL_VERSION or data.get("market") != market or "shard" in data or "market_status" not in data:
+        raise ValueError(f"{path}: {market} 시장 상태 파일이 아님")
+    return data["market_status"]
+
+def write_partial(path, market, shard_idx, num_shards, payload):
+    """샤드 스캔 결과를 compact JSON 파일로 저장"""
+    data = {"version": PARTIAL_VERSION, "market": market,
+            "shard": shard_idx, "num_shards": num_shards, **payload}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_partials(paths, market):
+    """샤드 결과 파일들을 읽어 샤드 번호 순으로 정렬, 누락/중복 샤드나 시장 상태가 다른 샤드가 있으면 ValueError"""
+    partials = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != PARTIAL_VERSION or data.get("market") != market or "results" not in data:
+            raise ValueError(f"{path}: {market} v{PARTIAL_VERSION} 샤드 파일이 아님")
+        partials.append(data)
+    if not partials:
+        raise ValueError("병합할 샤드 파일이 없음")
+
+    partials.sort(key=lambda p: p["shard"])
+    num_shards = partials[0]["num_shards"]
+    found = [p["shard"] for p in partials]
+    if any(p["num_shards"] != num_shards for p in partials) or found != list(range(num_shards)):
+        raise ValueError(f"샤드 구성 불일치: {found} (기대값 0..{num_shards - 1})")
+    if any(p.get("market_status") != partials[0].get("market_status") for p in partials):
+        raise ValueError("샤드 간 시장 상태 불일치: 모든 샤드는 같은 --market 파일로 실행해야 함")
+    return partials
+
+def merge_lists(partials, key):
+    """샤드별 리스트를 샤드 순서대로 이어 붙임 (단일 프로세스 실행 순서와 동일)"""
+    return [x for p in partials for x in p[key]]